@@ -26,7 +26,6 @@ def get_db_connection() -> sqlite3.Connection:
 def init_db():
     """
     Initializes schema. Safe to call on every startup (IF NOT EXISTS guards).
-    Adds severity column population via a computed insert trigger.
     """
     conn   = get_db_connection()
     cursor = conn.cursor()
@@ -48,8 +47,31 @@ def init_db():
     # Index for fast timestamp-ordered queries (frontend history poll)
     cursor.execute('CREATE INDEX IF NOT EXISTS idx_timestamp ON readings (timestamp)')
 
-    # Index for severity filtering (anomaly audit log)
-    cursor.execute('CREATE INDEX IF NOT EXISTS idx_severity ON readings (severity)')
+    # Severity index superseded by anomaly_events; drop it from existing DBs
+    cursor.execute('DROP INDEX IF EXISTS idx_severity')
+
+    # Anomaly state machine transitions (START / SUSTAIN / CLEAR).
+    # Kept separate from readings so incident review is an index range scan,
+    # and not subject to readings pruning.
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS anomaly_events (
+            id               INTEGER PRIMARY KEY AUTOINCREMENT,
+            device_id        TEXT NOT NULL,
+            timestamp        DATETIME DEFAULT CURRENT_TIMESTAMP,
+            event_type       TEXT NOT NULL,
+            anomaly_type     TEXT NOT NULL,
+            peak_mu          REAL NOT NULL,
+            delta            REAL NOT NULL,
+            start_reading_id INTEGER,
+            end_reading_id   INTEGER
+        )
+    ''')
+
+    # Index for per-device time-window queries + keyset pagination on (timestamp, id)
+    cursor.execute(
+        'CREATE INDEX IF NOT EXISTS idx_anomaly_device_time '
+        'ON anomaly_events (device_id, timestamp, id)'
+    )
 
     conn.commit()
     conn.close()
@@ -76,16 +98,39 @@ def prune_old_data(days_to_keep: int = 7):
         print(f"[DB ERROR] Prune failed: {e}")
 
 
-def get_anomaly_log(limit: int = 50) -> list:
+def _anomaly_window(device_id: str, since: str = None, until: str = None) -> tuple:
     """
-    Returns recent anomaly events for audit/debug dashboard.
+    Builds the WHERE clause shared by the anomaly queries.
+    Always leads with device_id so idx_anomaly_device_time serves the range.
+    """
+    clauses = ['device_id = ?']
+    params  = [device_id]
+    if since:
+        clauses.append('timestamp >= ?')
+        params.append(since)
+    if until:
+        clauses.append('timestamp < ?')
+        params.append(until)
+    return ' AND '.join(clauses), params
+
+
+def get_anomaly_log(device_id: str, limit: int = 50, since: str = None,
+                    until: str = None, before: tuple = None) -> list:
+    """
+    Returns anomaly events for the audit/debug dashboard, newest first.
+    Keyset pagination: pass before=(timestamp, id) of the last row seen.
     """
     try:
+        where, params = _anomaly_window(device_id, since, until)
+        if before:
+            where += ' AND (timestamp, id) < (?, ?)'
+            params.extend(before)
         conn   = get_db_connection()
         cursor = conn.cursor()
         cursor.execute(
-            "SELECT * FROM readings WHERE severity != 'NORMAL' ORDER BY timestamp DESC LIMIT ?",
-            (limit,)
+            f'SELECT * FROM anomaly_events WHERE {where} '
+            'ORDER BY timestamp DESC, id DESC LIMIT ?',
+            (*params, limit)
         )
         rows = [dict(row) for row in cursor.fetchall()]
         conn.close()
@@ -95,5 +140,35 @@ def get_anomaly_log(limit: int = 50) -> list:
         return []
 
 
+def get_anomaly_summary(device_id: str, since: str = None, until: str = None) -> dict:
+    """
+    Event counts per anomaly type over a time window.
+    Returns: {"HEAT": {"START": n, "SUSTAIN": n, "CLEAR": n, "peak_mu": x}, "COLD": {...}}
+    """
+    summary = {
+        kind: {"START": 0, "SUSTAIN": 0, "CLEAR": 0, "peak_mu": 0.0}
+        for kind in ("HEAT", "COLD")
+    }
+    try:
+        where, params = _anomaly_window(device_id, since, until)
+        conn   = get_db_connection()
+        cursor = conn.cursor()
+        cursor.execute(
+            'SELECT anomaly_type, event_type, COUNT(*) AS n, MAX(peak_mu) AS peak_mu '
+            f'FROM anomaly_events WHERE {where} GROUP BY anomaly_type, event_type',
+            params
+        )
+        for row in cursor.fetchall():
+            bucket = summary.setdefault(
+                row["anomaly_type"], {"START": 0, "SUSTAIN": 0, "CLEAR": 0, "peak_mu": 0.0}
+            )
+            bucket[row["event_type"]] = row["n"]
+            bucket["peak_mu"] = max(bucket["peak_mu"], row["peak_mu"] or 0.0)
+        conn.close()
+    except Exception as e:
+        print(f"[DB ERROR] Anomaly summary failed: {e}")
+    return summary
+
+
 if __name__ == "__main__":
     init_db()
@@ -2,13 +2,13 @@ import os
 import uvicorn
 import random
 import math
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 from dotenv import load_dotenv
 from fastapi import FastAPI, Header, HTTPException, Query
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 
-from .database import get_db_connection, init_db
+from .database import get_db_connection, init_db, get_anomaly_log, get_anomaly_summary
 from .model_helper import ModelEngine
 
 # ──────────────────────────────────────────────
@@ -18,10 +18,12 @@ from .model_helper import ModelEngine
 #   [2] /simulate endpoint for public demo (no auth required)
 #   [3] /status public read endpoint (no auth required)
 #   [4] /history returns richer payload for frontend sparkline
+#   [5] Anomaly transitions persisted to anomaly_events; /anomalies audit endpoint
 # ──────────────────────────────────────────────
 
 load_dotenv()
 API_KEY = os.getenv("PROACTIVE_API_KEY", "dev-key-change-me")
+DEVICE_ID = os.getenv("COZYSENSE_DEVICE_ID", "esp32-01")
 
 app = FastAPI(
     title="CozySense — Proactive Climate Engine",
@@ -57,6 +59,12 @@ last_persisted = {
 
 HYSTERESIS_SECONDS = 10  # Minimum interval between hardware state changes
 
+# ── Open Anomaly Incident ──────────────────────────────────────────────────
+# Reading ID that START'ed the current incident; SUSTAIN/CLEAR events span
+# from here to the reading that produced them. Only advanced after a
+# successful commit; None means the incident start is unknown (lost write).
+anomaly_incident = {"start_reading_id": None}
+
 
 @app.on_event("startup")
 def startup_event():
@@ -124,6 +132,62 @@ async def get_history(limit: int = Query(default=20, le=100)):
         return {"error": str(e)}
 
 
+def _to_db_timestamp(value: str) -> str:
+    """
+    Parses an ISO-8601 timestamp into SQLite CURRENT_TIMESTAMP form
+    ('YYYY-MM-DD HH:MM:SS', UTC) so string comparison orders correctly.
+    Naive input is UTC, like the timestamps /anomalies returns.
+    Raises ValueError on bad input.
+    """
+    parsed = datetime.fromisoformat(value)
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.astimezone(timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+
+
+@app.get("/anomalies", tags=["Public"])
+async def get_anomalies(
+    device_id: str = Query(default=None),
+    since:     str = Query(default=None, description="Window start (inclusive), ISO-8601; naive = UTC"),
+    until:     str = Query(default=None, description="Window end (exclusive), ISO-8601; naive = UTC"),
+    cursor:    str = Query(default=None, description="next_cursor from the previous page"),
+    limit:     int = Query(default=50, ge=1, le=200)
+):
+    """
+    Anomaly incident audit log, newest first, with per-type summary counts
+    for the requested window. Paginate by passing back next_cursor.
+    """
+    device_id = device_id or DEVICE_ID
+
+    try:
+        since = _to_db_timestamp(since) if since else None
+        until = _to_db_timestamp(until) if until else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="since/until must be ISO-8601 timestamps.")
+
+    before = None
+    if cursor:
+        try:
+            ts, event_id = cursor.rsplit("|", 1)
+            before = (_to_db_timestamp(ts), int(event_id))
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Malformed cursor.")
+
+    events = get_anomaly_log(device_id, limit, since, until, before)
+    next_cursor = None
+    if len(events) == limit:
+        last = events[-1]
+        next_cursor = f"{last['timestamp']}|{last['id']}"
+
+    return {
+        "device_id":   device_id,
+        "window":      {"since": since, "until": until},
+        "summary":     get_anomaly_summary(device_id, since, until),
+        "events":      events,
+        "next_cursor": next_cursor
+    }
+
+
 @app.get("/simulate", tags=["Public Demo"])
 async def simulate_scenario(scenario: str = Query(default="stable")):
     """
@@ -187,9 +251,12 @@ async def _process_reading(temp: float, hum: float) -> dict:
     p30, p60 = temp, temp
     led_cmd, state, human_msg = "RED_ON", "STABLE", "Monitoring..."
 
+    anomaly_events = []
+
     if engine:
         p30, p60     = engine.predict_horizons(temp)
         led_cmd, state, human_msg = engine.get_contextual_status(temp, p30, p60)
+        anomaly_events = engine.drain_anomaly_events()
 
     # ── Hysteresis gate ────────────────────────────────────────────────────
     now = datetime.now()
@@ -219,19 +286,45 @@ async def _process_reading(temp: float, hum: float) -> dict:
         human_msg = last_persisted["human_msg"]
 
     # ── Persistence (DB write uses resolved state, not raw computed state) ─
+    conn = None
     try:
         conn = get_db_connection()
         cursor = conn.cursor()
         cursor.execute(
             '''INSERT INTO readings
-               (temperature, humidity, prediction_30, prediction_60, decision, human_notes)
-               VALUES (?, ?, ?, ?, ?, ?)''',
-            (temp, hum, p30, p60, f"{led_cmd}:{state}", human_msg)
+               (temperature, humidity, prediction_30, prediction_60, decision, severity, human_notes)
+               VALUES (?, ?, ?, ?, ?, ?, ?)''',
+            (temp, hum, p30, p60, f"{led_cmd}:{state}",
+             "HIGH" if "ANOMALY" in state else "NORMAL", human_msg)
         )
+        reading_id = cursor.lastrowid
+
+        # Anomaly transitions share the reading's transaction
+        start_reading_id = anomaly_incident["start_reading_id"]
+        for event in anomaly_events:
+            if event["event_type"] == "START":
+                start_reading_id = reading_id
+            cursor.execute(
+                '''INSERT INTO anomaly_events
+                   (device_id, event_type, anomaly_type, peak_mu, delta,
+                    start_reading_id, end_reading_id)
+                   VALUES (?, ?, ?, ?, ?, ?, ?)''',
+                (DEVICE_ID, event["event_type"], event["anomaly_type"], event["peak_mu"],
+                 event["delta"], start_reading_id, reading_id)
+            )
+            if event["event_type"] == "CLEAR":
+                start_reading_id = None
         conn.commit()
-        conn.close()
+        anomaly_incident["start_reading_id"] = start_reading_id
     except Exception as db_error:
         print(f"[DB ERROR] {db_error}")
+        # The engine queue is already drained; don't point at a rolled-back reading
+        if any(event["event_type"] == "START" for event in anomaly_events):
+            anomaly_incident["start_reading_id"] = None
+    finally:
+        # Closing without commit rolls back a half-written reading and frees the write lock
+        if conn:
+            conn.close()
 
     # ── Response ───────────────────────────────────────────────────────────
     return {
@@ -13,6 +13,7 @@ MODEL_PATH = os.path.join(os.path.dirname(__file__), '../models/sarima_thermal_m
 #   [2] Spike detection separated from forecast injection (no double evaluation)
 #   [3] Anomaly cooldown/clear logic added
 #   [4] Thresholds symmetric + documented
+#   [5] State machine emits START / SUSTAIN / CLEAR anomaly events
 # ──────────────────────────────────────────────
 
 class ModelEngine:
@@ -44,6 +45,14 @@ class ModelEngine:
         self._cooldown_counter = 0
         self.ANOMALY_COOLDOWN_SAMPLES = 5  # ~25 min at 5-min intervals
 
+        # ── Anomaly Event Log ─────────────────────────────────────────────
+        # Transitions of the state machine above are queued here and drained
+        # by the gateway, which persists them alongside the reading.
+        # Peak μ / δ are tracked per incident (START → CLEAR).
+        self._anomaly_peak_mu    = 0.0
+        self._anomaly_peak_delta = 0.0
+        self._pending_events     = []
+
         # ── Model Loading ─────────────────────────────────────────────────
         self.model = None
         if os.path.exists(MODEL_PATH):
@@ -225,6 +234,43 @@ class ModelEngine:
 
         return random.choice(scripts["STABLE"])
 
+    # ═══════════════════════════════════════════════════════════════════════
+    #  ANOMALY EVENT EMISSION
+    # ═══════════════════════════════════════════════════════════════════════
+
+    def _fold_anomaly_peak(self, mu: float, delta: float) -> bool:
+        """
+        Folds a reading's (μ, δ) into the incident peak.
+        Returns True if peak μ rose (worth a SUSTAIN event).
+        """
+        if abs(delta) > abs(self._anomaly_peak_delta):
+            self._anomaly_peak_delta = delta
+        if mu > self._anomaly_peak_mu:
+            self._anomaly_peak_mu = mu
+            return True
+        return False
+
+    def _emit_anomaly_event(self, event_type: str):
+        """
+        Queues a transition event carrying the incident peak so far.
+        event_type: "START" | "SUSTAIN" | "CLEAR"
+        """
+        self._pending_events.append({
+            "event_type":   event_type,
+            "anomaly_type": self._anomaly_type,
+            "peak_mu":      round(self._anomaly_peak_mu, 4),
+            "delta":        round(self._anomaly_peak_delta, 4)
+        })
+
+    def drain_anomaly_events(self) -> list:
+        """
+        Returns and clears the events queued by the last get_contextual_status() call.
+        A single reading yields two events (CLEAR then START) only when the
+        cooldown expires into a spike of the opposite direction.
+        """
+        events, self._pending_events = self._pending_events, []
+        return events
+
     # ═══════════════════════════════════════════════════════════════════════
     #  FUZZY INFERENCE ENGINE (MAIN DECISION GATE)
     #  FIX [3]: Anomaly cooldown prevents false re-triggers after resolution.
@@ -242,23 +288,39 @@ class ModelEngine:
           3. Proactive prep (forecast ≥ WARM_THRESHOLD with μ > 0.4)
           4. Economy mode (current temp ≤ COLD_VALLEY)
           5. Stable default
+
+        State machine transitions are queued for drain_anomaly_events().
         """
 
+        # Events are per-reading; undrained ones from a previous call are dropped
+        self._pending_events = []
+
+        # ── 1. ANOMALY INFERENCE ───────────────────────────────────────────
+        is_spike, direction, delta, mu_a = self._detect_spike()
+
         # ── Cooldown tick ──────────────────────────────────────────────────
+        extended = False
         if self._cooldown_counter > 0:
             self._cooldown_counter -= 1
             if self._cooldown_counter == 0:
-                self._anomaly_active = False
-                self._anomaly_type   = None
-
-        # ── 1. ANOMALY INFERENCE ───────────────────────────────────────────
-        is_spike, direction, delta, mu_a = self._detect_spike()
+                if is_spike and direction == self._anomaly_type:
+                    # Surge still in progress — extend the incident, don't split it
+                    self._cooldown_counter = self.ANOMALY_COOLDOWN_SAMPLES
+                    extended = True
+                else:
+                    self._emit_anomaly_event("CLEAR")
+                    self._anomaly_active = False
+                    self._anomaly_type   = None
 
         if is_spike and not self._anomaly_active:
             # Arm the anomaly and start cooldown
-            self._anomaly_active   = True
-            self._anomaly_type     = direction
-            self._cooldown_counter = self.ANOMALY_COOLDOWN_SAMPLES
+            self._anomaly_active     = True
+            self._anomaly_type       = direction
+            self._cooldown_counter   = self.ANOMALY_COOLDOWN_SAMPLES
+            self._anomaly_peak_mu    = 0.0
+            self._anomaly_peak_delta = 0.0
+            self._fold_anomaly_peak(mu_a, delta)
+            self._emit_anomaly_event("START")
 
             if direction == "HEAT":
                 msg = self._fuzzy_script_engine("HEAT_ANOMALY", mu_a)
@@ -267,8 +329,14 @@ class ModelEngine:
                 msg = self._fuzzy_script_engine("COLD_ANOMALY", mu_a)
                 return "BLUE_BLINK", "ANOMALY_COLD", msg
 
-        # If anomaly is still in cooldown window, sustain the alert
+        # If anomaly is still in cooldown window, sustain the alert.
+        # SUSTAIN is only logged when the incident moves: cooldown re-armed or peak μ rose.
         if self._anomaly_active:
+            peak_rose = False
+            if is_spike and direction == self._anomaly_type:
+                peak_rose = self._fold_anomaly_peak(mu_a, delta)
+            if extended or peak_rose:
+                self._emit_anomaly_event("SUSTAIN")
             if self._anomaly_type == "HEAT":
                 msg = self._fuzzy_script_engine("HEAT_ANOMALY", mu_a if mu_a > 0 else 0.3)
                 return "YELLOW_BLINK", "ANOMALY_HEAT", msg
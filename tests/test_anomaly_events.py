@@ -0,0 +1,312 @@
+import time
+
+import pytest
+
+from app import database
+from app.model_helper import ModelEngine
+
+# ──────────────────────────────────────────────
+#  Anomaly event log: state-machine emission + keyset-paginated audit queries
+# ──────────────────────────────────────────────
+
+BASELINE = [24.0] * 6
+
+
+@pytest.fixture
+def engine():
+    eng = ModelEngine()
+    eng.model = None   # persistence forecasts — deterministic
+    return eng
+
+
+@pytest.fixture
+def db_path(tmp_path, monkeypatch):
+    path = str(tmp_path / "iot_data.db")
+    monkeypatch.setattr(database, "DB_PATH", path)
+    database.init_db()
+    return path
+
+
+def _run(engine, temps) -> list:
+    """Feeds readings through the engine; returns (sample_index, event) pairs."""
+    emitted = []
+    for i, temp in enumerate(temps):
+        p30, p60 = engine.predict_horizons(temp)
+        engine.get_contextual_status(temp, p30, p60)
+        emitted.extend((i, event) for event in engine.drain_anomaly_events())
+    return emitted
+
+
+def _run_scripted(engine, spikes) -> list:
+    """
+    Drives get_contextual_status with a scripted (is_spike, direction, delta, mu)
+    sequence in place of _detect_spike; returns (sample_index, event) pairs.
+    """
+    feed = iter(spikes)
+    engine._detect_spike = lambda: next(feed)
+    emitted = []
+    for i in range(len(spikes)):
+        engine.get_contextual_status(24.0, 24.0, 24.0)
+        emitted.extend((i, event) for event in engine.drain_anomaly_events())
+    return emitted
+
+
+def _insert_event(conn, event_id, timestamp, event_type="START", anomaly_type="HEAT",
+                  peak_mu=0.5, device_id="esp32-01"):
+    conn.execute(
+        '''INSERT INTO anomaly_events
+           (id, device_id, timestamp, event_type, anomaly_type, peak_mu, delta,
+            start_reading_id, end_reading_id)
+           VALUES (?, ?, ?, ?, ?, ?, 2.0, 1, 1)''',
+        (event_id, device_id, timestamp, event_type, anomaly_type, peak_mu)
+    )
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+#  STATE MACHINE EMISSION
+# ═══════════════════════════════════════════════════════════════════════════
+
+def test_incident_emits_start_sustain_clear_in_order(engine):
+    temps   = BASELINE + [28.0, 32.0, 32.0] + [32.0] * 20
+    emitted = _run(engine, temps)
+
+    # Surge outlives one cooldown → a single SUSTAIN for the re-arm, not one per reading
+    assert [event["event_type"] for _, event in emitted] == ["START", "SUSTAIN", "CLEAR"]
+    start, sustain, clear = (i for i, _ in emitted)
+    assert sustain - start == engine.ANOMALY_COOLDOWN_SAMPLES
+    assert clear - sustain == engine.ANOMALY_COOLDOWN_SAMPLES
+
+
+def test_continuous_surge_is_one_incident(engine):
+    temps  = BASELINE + [24.0 + 4 * i for i in range(1, 15)]
+    events = [event["event_type"] for _, event in _run(engine, temps)]
+
+    assert events.count("START") == 1
+    assert "CLEAR" not in events
+
+
+def test_peak_tracks_max_and_resets_per_incident(engine):
+    quiet = (False, None, 0.0, 0.0)
+    emitted = _run_scripted(engine, [
+        (True, "HEAT", 2.0, 0.3),
+        (True, "HEAT", 3.0, 1.0),     # peak rises → SUSTAIN
+        (True, "HEAT", 1.6, 0.1),     # below peak → no event
+        quiet, quiet,
+        quiet,                        # cooldown expiry → CLEAR
+        (True, "HEAT", 1.6, 0.1),     # second, milder incident
+    ])
+
+    assert [(i, e["event_type"]) for i, e in emitted] == [
+        (0, "START"), (1, "SUSTAIN"), (5, "CLEAR"), (6, "START")
+    ]
+    events = [event for _, event in emitted]
+    assert events[1]["peak_mu"] == 1.0 and events[1]["delta"] == 3.0
+    assert events[2]["peak_mu"] == 1.0 and events[2]["delta"] == 3.0
+    assert events[3]["peak_mu"] == 0.1 and events[3]["delta"] == 1.6
+
+
+def test_opposite_spike_at_expiry_clears_then_starts_in_one_reading(engine):
+    heat    = (True, "HEAT", 2.0, 0.3)
+    emitted = _run_scripted(engine, [heat] * 4 + [(False, None, 0.0, 0.0), (True, "COLD", -3.0, 0.5)])
+
+    last_reading = [event for i, event in emitted if i == 5]
+    assert [(e["event_type"], e["anomaly_type"]) for e in last_reading] == [
+        ("CLEAR", "HEAT"),
+        ("START", "COLD"),
+    ]
+
+
+def test_events_are_per_reading(engine):
+    feed = iter([(True, "HEAT", 2.0, 0.3), (True, "HEAT", 2.5, 0.6)])
+    engine._detect_spike = lambda: next(feed)
+    engine.get_contextual_status(24.0, 24.0, 24.0)
+    engine.get_contextual_status(24.0, 24.0, 24.0)   # first call never drained
+
+    assert [e["event_type"] for e in engine.drain_anomaly_events()] == ["SUSTAIN"]
+    assert engine.drain_anomaly_events() == []
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+#  AUDIT QUERIES
+# ═══════════════════════════════════════════════════════════════════════════
+
+def test_keyset_pagination_handles_same_second_ties(db_path):
+    conn = database.get_db_connection()
+    for event_id in range(1, 6):
+        _insert_event(conn, event_id, "2026-10-19 14:00:00")
+    _insert_event(conn, 6, "2026-10-19 14:00:01")
+    conn.commit()
+    conn.close()
+
+    seen, before = [], None
+    while True:
+        page = database.get_anomaly_log("esp32-01", limit=2, before=before)
+        if not page:
+            break
+        seen.extend(row["id"] for row in page)
+        before = (page[-1]["timestamp"], page[-1]["id"])
+
+    assert seen == [6, 5, 4, 3, 2, 1]
+
+
+def test_window_and_summary_are_per_device(db_path):
+    conn = database.get_db_connection()
+    _insert_event(conn, 1, "2026-10-18 23:59:59", "START", "HEAT", 0.9)
+    _insert_event(conn, 2, "2026-10-19 10:00:00", "START", "HEAT", 0.4)
+    _insert_event(conn, 3, "2026-10-19 10:05:00", "SUSTAIN", "HEAT", 0.7)
+    _insert_event(conn, 4, "2026-10-19 11:00:00", "START", "COLD", 0.2)
+    _insert_event(conn, 5, "2026-10-19 11:00:00", "START", "HEAT", 1.0, device_id="other")
+    conn.commit()
+    conn.close()
+
+    window = ("2026-10-19 00:00:00", "2026-10-20 00:00:00")
+    rows   = database.get_anomaly_log("esp32-01", 50, *window)
+    assert [row["id"] for row in rows] == [4, 3, 2]
+
+    summary = database.get_anomaly_summary("esp32-01", *window)
+    assert summary["HEAT"] == {"START": 1, "SUSTAIN": 1, "CLEAR": 0, "peak_mu": 0.7}
+    assert summary["COLD"] == {"START": 1, "SUSTAIN": 0, "CLEAR": 0, "peak_mu": 0.2}
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+#  /anomalies ENDPOINT
+# ═══════════════════════════════════════════════════════════════════════════
+
+@pytest.fixture
+def client(db_path):
+    from fastapi.testclient import TestClient
+    from app import main
+    with TestClient(main.app) as test_client:
+        yield test_client
+
+
+def test_anomalies_paginates_with_next_cursor(client):
+    conn = database.get_db_connection()
+    for event_id in range(1, 4):
+        _insert_event(conn, event_id, "2026-10-19 14:00:00")
+    conn.commit()
+    conn.close()
+
+    first = client.get("/anomalies", params={"limit": 2}).json()
+    assert [e["id"] for e in first["events"]] == [3, 2]
+    second = client.get("/anomalies", params={"limit": 2, "cursor": first["next_cursor"]}).json()
+    assert [e["id"] for e in second["events"]] == [1]
+    assert second["next_cursor"] is None
+
+
+def test_anomalies_accepts_iso_t_separator_bounds(client):
+    conn = database.get_db_connection()
+    _insert_event(conn, 1, "2026-10-19 14:58:32")
+    conn.commit()
+    conn.close()
+
+    response = client.get("/anomalies", params={"since": "2026-10-19T14:00:00+00:00"})
+    assert response.status_code == 200
+    body = response.json()
+    assert body["window"]["since"] == "2026-10-19 14:00:00"
+    assert [e["id"] for e in body["events"]] == [1]
+
+
+@pytest.fixture
+def non_utc_local_tz(monkeypatch):
+    monkeypatch.setenv("TZ", "America/New_York")
+    time.tzset()
+    yield
+    monkeypatch.undo()
+    time.tzset()
+
+
+def test_anomalies_naive_bounds_are_utc(client, non_utc_local_tz):
+    conn = database.get_db_connection()
+    _insert_event(conn, 1, "2026-10-19 19:02:19")
+    conn.commit()
+    conn.close()
+
+    # An event's own timestamp round-trips as a window bound
+    body = client.get("/anomalies", params={"since": "2026-10-19 19:02:19"}).json()
+    assert body["window"]["since"] == "2026-10-19 19:02:19"
+    assert [e["id"] for e in body["events"]] == [1]
+
+
+@pytest.mark.parametrize("params", [
+    {"cursor": "not-a-cursor"},
+    {"cursor": "yesterday|3"},
+    {"cursor": "2026-10-19 14:00:00|abc"},
+    {"since": "last tuesday"},
+    {"until": "2026-13-40"},
+])
+def test_anomalies_rejects_malformed_input(client, params):
+    assert client.get("/anomalies", params=params).status_code == 400
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+#  PERSISTENCE (_process_reading via /telemetry)
+# ═══════════════════════════════════════════════════════════════════════════
+
+@pytest.fixture
+def gateway(client, engine, monkeypatch):
+    from app import main
+    monkeypatch.setattr(main, "engine", engine)
+    monkeypatch.setitem(main.anomaly_incident, "start_reading_id", None)
+
+    def send(temp: float):
+        response = client.post(
+            "/telemetry", params={"temp": temp, "hum": 50.0}, headers={"X-API-Key": main.API_KEY}
+        )
+        assert response.status_code == 200
+
+    return main, send
+
+
+def _rows(sql: str) -> list:
+    conn = database.get_db_connection()
+    rows = [tuple(row) for row in conn.execute(sql).fetchall()]
+    conn.close()
+    return rows
+
+
+def test_events_span_persisted_reading_ids(gateway):
+    main, send = gateway
+    for temp in BASELINE + [28.0, 32.0, 32.0] + [32.0] * 20:
+        send(temp)
+
+    reading_ids = [row[0] for row in _rows("SELECT id FROM readings ORDER BY id")]
+    start, sustain, clear = reading_ids[7], reading_ids[12], reading_ids[17]
+    assert _rows(
+        "SELECT event_type, start_reading_id, end_reading_id FROM anomaly_events ORDER BY id"
+    ) == [("START", start, start), ("SUSTAIN", start, sustain), ("CLEAR", start, clear)]
+    assert main.anomaly_incident["start_reading_id"] is None
+
+
+def test_failed_start_write_does_not_leave_rolled_back_start(gateway, engine):
+    main, send = gateway
+    spike = {"now": (False, None, 0.0, 0.0)}
+    engine._detect_spike = lambda: spike["now"]
+    send(24.0)
+
+    conn = database.get_db_connection()
+    conn.execute(
+        "CREATE TRIGGER fail_events BEFORE INSERT ON anomaly_events "
+        "BEGIN SELECT RAISE(ABORT, 'disk I/O error'); END"
+    )
+    conn.commit()
+    conn.close()
+
+    spike["now"] = (True, "HEAT", 2.0, 0.3)
+    send(26.0)                                  # START reading rolled back
+
+    assert _rows("SELECT COUNT(*) FROM readings") == [(1,)]
+    assert main.anomaly_incident["start_reading_id"] is None
+
+    conn = database.get_db_connection()
+    conn.execute("DROP TRIGGER fail_events")
+    conn.commit()
+    conn.close()
+
+    spike["now"] = (True, "HEAT", 3.0, 0.8)
+    send(28.0)                                  # peak rise → SUSTAIN, reuses the rolled-back rowid
+
+    reading_id = _rows("SELECT MAX(id) FROM readings")[0][0]
+    assert _rows(
+        "SELECT event_type, start_reading_id, end_reading_id FROM anomaly_events"
+    ) == [("SUSTAIN", None, reading_id)]